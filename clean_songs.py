@@ -1,13 +1,13 @@
 # %%
 import polars as pl
 # %%
-df = pl.read_csv("data/artist_songs.csv")
+df = pl.scan_csv("data/artist_songs.csv")
 # %%
 df = df.filter(pl.col("primary_artist") == "Caparezza")
 # %%
 df = df.filter(
-    ~pl.col("title").str.to_lowercase().str.contains("remix|live|demo|radio|skit")
+    ~pl.col("title").str.contains(r"(?i)\b(remix|live|demo|radio|skit)\b")
 )
 # %%
-df.write_csv("data/caparezza_songs.csv")
+df.sink_csv("data/caparezza_songs.csv")
 # %%
@@ -1,53 +1,188 @@
 # %%
-from transformers import pipeline
+import platform
+from pathlib import Path
+
+import torch
+from transformers import AutoTokenizer, pipeline
 import polars as pl
 
-classifier = pipeline(
-    "text-classification", model="MilaNLProc/feel-it-italian-emotion", top_k=2
-)
+MODEL_NAME = "MilaNLProc/feel-it-italian-emotion"
+
+# Use the GPU in half precision when one is available, fall back to CPU fp32.
+if torch.cuda.is_available():
+    device, dtype = "cuda", torch.float16
+elif torch.backends.mps.is_available():
+    device, dtype = "mps", torch.float16
+else:
+    device, dtype = "cpu", torch.float32
+
+# Predictions differ slightly between the backends, so they are cached apart
+backend = "onnx-int8" if device == "cpu" else f"{device}-fp16"
+
+if device == "cpu":
+    # On CPU, run an int8 quantized ONNX export of the model instead
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    quantized_dir = Path("models/feel-it-italian-emotion-int8")
+    if not quantized_dir.exists():
+        onnx_model = ORTModelForSequenceClassification.from_pretrained(
+            MODEL_NAME, export=True
+        )
+        if platform.machine() in ("arm64", "aarch64"):
+            qconfig = AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+        else:
+            qconfig = AutoQuantizationConfig.avx512_vnni(
+                is_static=False, per_channel=False
+            )
+        quantizer = ORTQuantizer.from_pretrained(onnx_model)
+        quantizer.quantize(save_dir=quantized_dir, quantization_config=qconfig)
+        tokenizer.save_pretrained(quantized_dir)
+
+    model = ORTModelForSequenceClassification.from_pretrained(
+        quantized_dir, file_name="model_quantized.onnx"
+    )
+    classifier = pipeline(
+        "text-classification", model=model, tokenizer=tokenizer, top_k=2
+    )
+else:
+    classifier = pipeline(
+        "text-classification",
+        model=MODEL_NAME,
+        top_k=2,
+        device=device,
+        dtype=dtype,
+    )
 # %%
-with open(
+lyrics = Path(
     'data/lyrics/album:"Prisoner 709"(2017)/_Larsen (Capitolo_ La Tortura)_.txt'
-) as f:
-    lyrics = f.readlines()
-predictions = classifier(lyrics)
+).read_text(encoding="utf-8").splitlines()
+with torch.inference_mode():
+    predictions = classifier(lyrics)
 df = pl.DataFrame({"lyric": lyrics, "predictions": [str(pred) for pred in predictions]})
 # %%
-from pathlib import Path
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 
-for album in tqdm(
-    Path("data/lyrics").iterdir(), total=Path("data/lyrics").stat().st_nlink - 2
-):
-    if album.is_dir():
-        if album.with_suffix(".parquet").exists():
-            tqdm.write(f"Skipping {album.name}, parquet file already exists.")
+# All albums are stored in a single parquet file; albums that are already in
+# it are skipped, so the analysis can be resumed.
+output_file = Path("data/lyrics.parquet")
+all_dfs = []
+done_albums = set()
+if output_file.exists():
+    existing_df = pl.read_parquet(output_file)
+    all_dfs.append(existing_df)
+    done_albums = set(existing_df["album"].unique())
+
+# The classification only depends on the line, so the predictions are cached by
+# line hash: repeated lines (e.g. choruses) are classified once, also across runs.
+# There is one cache per model and backend, so their predictions don't mix.
+cache_file = Path(
+    f"data/emotion_cache_{MODEL_NAME.replace('/', '__')}_{backend}.parquet"
+)
+prediction_cache = {}
+if cache_file.exists():
+    cache_df = pl.read_parquet(cache_file)
+    prediction_cache = dict(
+        zip(cache_df["line_hash"].to_list(), cache_df["predictions"].to_list())
+    )
+
+
+def line_hash(line):
+    return hashlib.blake2b(line.encode(), digest_size=16).hexdigest()
+
+
+def save_results():
+    """Write the albums processed so far and the prediction cache to disk."""
+    # Each file is written next to its target and then swapped in, so an
+    # interrupted write can't corrupt the results of the previous albums
+    tmp_output = output_file.with_suffix(".parquet.tmp")
+    pl.concat(all_dfs).write_parquet(
+        tmp_output, compression="zstd", row_group_size=10000, statistics=True
+    )
+    os.replace(tmp_output, output_file)
+
+    tmp_cache = cache_file.with_suffix(".parquet.tmp")
+    pl.DataFrame(
+        {
+            "line_hash": list(prediction_cache.keys()),
+            "predictions": list(prediction_cache.values()),
+        }
+    ).write_parquet(tmp_cache)
+    os.replace(tmp_cache, cache_file)
+
+
+def read_album(album_path):
+    """Read all the lyrics of an album, returning the lines and song offsets."""
+    all_lines = []
+    offsets = []
+    lyric_files = sorted(
+        (entry for entry in os.scandir(album_path) if entry.name.endswith(".txt")),
+        key=lambda entry: entry.name,
+    )
+    for lyric_file in lyric_files:
+        song_name = lyric_file.name.removesuffix(".txt")
+        lyrics = Path(lyric_file.path).read_text(encoding="utf-8").splitlines()
+        offsets.append((song_name, len(all_lines), len(all_lines) + len(lyrics)))
+        all_lines.extend(lyrics)
+    return all_lines, offsets
+
+
+albums = []
+for entry in os.scandir("data/lyrics"):
+    if entry.is_dir():
+        if entry.name.removeprefix('album:"') in done_albums:
+            tqdm.write(f"Skipping {entry.name}, already in {output_file}.")
             continue
+        albums.append(entry)
+
+# Every song of an album is classified in a single large batch. The next album
+# is read by a background thread while the current one is classified, so the
+# disk reads overlap with the inference.
+with ThreadPoolExecutor(max_workers=1) as executor:
+    next_album = executor.submit(read_album, albums[0].path) if albums else None
+    for i, album in enumerate(tqdm(albums)):
+        all_lines, offsets = next_album.result()
+        if i + 1 < len(albums):
+            next_album = executor.submit(read_album, albums[i + 1].path)
         album_name = album.name.removeprefix('album:"')
+        if not offsets:
+            tqdm.write(f"Skipping {album_name}, no lyrics found.")
+            continue
+        tqdm.write(f"Processing album: {album_name} ({len(offsets)} songs)...")
+        hashes = [line_hash(line) for line in all_lines]
+        new_lines = {
+            h: line for h, line in zip(hashes, all_lines) if h not in prediction_cache
+        }
+        if new_lines:
+            try:
+                with torch.inference_mode():
+                    new_predictions = classifier(
+                        list(new_lines.values()), batch_size=64, truncation=True
+                    )
+            except RuntimeError as e:
+                tqdm.write(f"  Error processing {album_name}: {e}")
+                raise e
+            prediction_cache.update(zip(new_lines.keys(), new_predictions))
+        predictions = [prediction_cache[h] for h in hashes]
+
         album_dfs = []
-        for lyric_file in tqdm(
-            sorted(list(album.iterdir())), desc=f"Processing album: {album_name}"
-        ):
-            if lyric_file.suffix == ".txt":
-                song_name = lyric_file.stem
-                tqdm.write(f"Processing {album_name} - {song_name}...")
-                with open(lyric_file) as f:
-                    lyrics = f.readlines()
-                try:
-                    predictions = classifier(lyrics)
-                except RuntimeError as e:
-                    tqdm.write(f"  Error processing {song_name}: {e}")
-                    raise e
-                df = pl.DataFrame(
-                    {
-                        "album": album_name,
-                        "song": song_name,
-                        "lyric": lyrics,
-                        "predictions": predictions,
-                    }
-                )
-                album_dfs.append(df)
-        output_file = album.with_suffix(".parquet")
-        album_df = pl.concat(album_dfs)
-        album_df.write_parquet(output_file)
+        for song_name, start, end in offsets:
+            df = pl.DataFrame(
+                {
+                    "album": album_name,
+                    "song": song_name,
+                    "lyric": all_lines[start:end],
+                    "predictions": predictions[start:end],
+                }
+            )
+            album_dfs.append(df)
+        all_dfs.append(pl.concat(album_dfs))
+
+        # Save after every album, so a failure in a later album doesn't lose
+        # the ones already classified and a rerun resumes from there
+        save_results()
 # %%
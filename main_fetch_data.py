@@ -1,6 +1,7 @@
 # %%
 import sys
 import csv
+import logging
 from pathlib import Path
 from src.request_script import APIRequester
 
@@ -81,6 +82,9 @@ def save_songs_to_csv(songs: list, filename: str = "artist_songs.csv"):
 def main():
     """Fetch and display all songs for artist ID 24580 (Caparezza)."""
     
+    # Show credential loading and retries; use DEBUG to also see each request
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Get workspace directory from command line or use current directory
     workspace_dir = sys.argv[1] if len(sys.argv) > 1 else "."
     
@@ -7,19 +7,20 @@ def main():
     scraper = LyricsScraper()
     
     df = pl.read_csv("data/caparezza_songs.csv")
-    songs = df.select(["title", "url"]).to_dicts()
+    titles = df["title"].to_list()
+    urls = df["url"].to_list()
         
-    print(f"=== Scraping {len(songs)} URLs ===\n")
-    results = scraper.scrape_multiple_urls([song["url"] for song in songs], delay=1.0)
+    print(f"=== Scraping {len(urls)} URLs ===\n")
+    results = scraper.scrape_multiple_urls(urls, delay=1.0)
    
-    for song, url in zip(songs, results.keys()):
-        lyrics = results[url]
+    for title, url in zip(titles, urls):
+        lyrics = results.get(url)
         if lyrics:
-            filename = f"data/lyrics/{song['title'].replace(' ', '_')}.txt"
+            filename = f"data/lyrics/{title.replace(' ', '_')}.txt"
             scraper.save_lyrics(lyrics, filename)
-            print(f"✓ Saved lyrics for '{song['title']}' to {filename}\n")
+            print(f"✓ Saved lyrics for '{title}' to {filename}\n")
         else:
-            print(f"✗ Failed to scrape lyrics for '{song['title']}' from {url}\n")
+            print(f"✗ Failed to scrape lyrics for '{title}' from {url}\n")
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
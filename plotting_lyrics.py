@@ -1,16 +1,19 @@
 
 # %%
 import matplotlib.pyplot as plt
+import polars as pl
+
+
+EMOTION_COLORS = {
+    "joy": "yellow",
+    "sadness": "blue",
+    "anger": "red",
+    "fear": "purple",
+}
 
 
 def get_color_for_emotion(emotion):
-    color_map = {
-        "joy": "yellow",
-        "sadness": "blue",
-        "anger": "red",
-        "fear": "purple",
-    }
-    return color_map.get(emotion, "gray")
+    return EMOTION_COLORS.get(emotion, "gray")
 
 def plot_lyrics(lyrics, predictions):
     fig, ax = plt.subplots(figsize=(8, 16))
@@ -18,10 +21,12 @@ def plot_lyrics(lyrics, predictions):
 
     emotions = [pred[0]["label"] if pred else "Unknown" for pred in predictions]
     confidences = [pred[0]["score"] if pred else 0 for pred in predictions]
-    y_positions = range(len(lyrics))
+    colors = [get_color_for_emotion(emotion) for emotion in emotions]
 
+    # Fix the limits up front so matplotlib doesn't autoscale on every text
+    ax.set_xlim(0, 1)
     ax.set_ylim(-1, len(lyrics))
-    for y, (lyric, emotion) in enumerate(zip(lyrics, emotions)):
+    for y, lyric in enumerate(lyrics):
         ax.text(
             0.5,
             y+0.5,
@@ -35,15 +40,27 @@ def plot_lyrics(lyrics, predictions):
             },
             # bbox=dict(
             #     boxstyle="round,pad=0.3",
-            #     facecolor=get_color_for_emotion(emotion),
+            #     facecolor=colors[y],
             #     alpha=0.1,
             # ),
-            color=get_color_for_emotion(emotion),
+            color=colors[y],
             alpha=confidences[y],
+            clip_on=False,
+            parse_math=False,
         )
     ax.axis("off")
     plt.tight_layout()
     ax.invert_yaxis()
 
+# %%
+# Only the rows and columns of the selected song are read from disk
+song_df = (
+    pl.scan_parquet("data/lyrics.parquet")
+    .filter(pl.col("song") == "_Larsen (Capitolo_ La Tortura)_")
+    .select(["lyric", "predictions"])
+    .collect(engine="streaming")
+)
+lyrics = song_df["lyric"].to_list()
+predictions = song_df["predictions"].to_list()
 # %%
 plot_lyrics(lyrics, predictions)
\ No newline at end of file
@@ -1,9 +1,28 @@
 # %%
 from bs4 import BeautifulSoup
+from datetime import timedelta
+from io import BytesIO
+from lxml import etree
 import requests
+import requests_cache
 import os
 import time
 
+# Share one session across all requests so connections to the host are reused.
+# Responses are cached on disk, so re-runs don't hit the server again. Artist
+# index pages expire after a day, so that new songs show up.
+SESSION = requests_cache.CachedSession(
+    "cache/azlyrics",
+    expire_after=timedelta(days=30),
+    urls_expire_after={"www.azlyrics.com/c/*": timedelta(days=1)},
+)
+SESSION.headers.update(
+    {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+)
+
+# Characters that are not allowed in filenames
+_FNAME_TRANS = str.maketrans({char: "_" for char in '/\\:*?"<>|'})
+
 
 def get_links_from_page(page_url: str) -> dict:
     """
@@ -15,56 +34,52 @@ def get_links_from_page(page_url: str) -> dict:
     Returns:
         Dictionary with album names as keys and lists of URLs as values
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
-
-    response = requests.get(page_url, headers=headers, timeout=10)
+    response = SESSION.get(page_url, timeout=10)
     response.raise_for_status()
 
-    soup = BeautifulSoup(response.content, "html.parser")
-
-    # Find the main listAlbum container
-    list_album = soup.find("div", id="listAlbum")
-    if not list_album:
-        return {}
-
     grouped_links = {}
     current_album = None
     current_links = []
 
-    # Iterate through direct children of listAlbum
-    for child in list_album.children:
-        # Skip text nodes and empty strings
-        if isinstance(child, str):
+    # Stream through the page instead of building the whole tree: divs are
+    # handled as soon as they are closed, and discarded right after
+    for _, elem in etree.iterparse(
+        BytesIO(response.content), events=("end",), tag="div", html=True
+    ):
+        parent = elem.getparent()
+
+        # Only direct children of the main listAlbum container are relevant
+        if parent is None or parent.get("id") != "listAlbum":
             continue
 
-        # Get element name and class safely
-        elem_name = getattr(child, "name", None)
-        elem_class = getattr(child, "get", lambda x: None)("class") or []
+        elem_class = (elem.get("class") or "").split()
 
         # Check if this is an album header
-        if elem_name == "div" and "album" in elem_class:
+        if "album" in elem_class:
             # Save previous album if it exists
             if current_album is not None:
                 grouped_links[current_album] = current_links
 
             # Start new album
-            current_album = child.get_text(strip=True)
+            current_album = "".join(text.strip() for text in elem.itertext())
             current_links = []
 
         # Check if this is a song item
-        elif elem_name == "div" and "listalbum-item" in elem_class:
+        elif "listalbum-item" in elem_class:
             # Find the <a> tag within the item
-            if hasattr(child, "find"):
-                link_tag = child.find("a", href=True)  # type: ignore
-                if link_tag and current_album is not None:
-                    href = str(link_tag["href"])
-                    # Convert relative URLs to absolute URLs if needed
-                    if href.startswith("/"):
-                        base_url = "/".join(page_url.split("/")[:3])
-                        href = base_url + href
-                    current_links.append(href)
+            link_tag = elem.find(".//a[@href]")
+            if link_tag is not None and current_album is not None:
+                href = link_tag.get("href")
+                # Convert relative URLs to absolute URLs if needed
+                if href.startswith("/"):
+                    base_url = "/".join(page_url.split("/")[:3])
+                    href = base_url + href
+                current_links.append(href)
+
+        # Free the elements that have already been processed
+        elem.clear()
+        while elem.getprevious() is not None:
+            del parent[0]
 
     # Don't forget the last album
     if current_album is not None:
@@ -73,6 +88,16 @@ def get_links_from_page(page_url: str) -> dict:
     return grouped_links
 
 
+def _uncache(url: str) -> None:
+    """
+    Remove a page from the cache, so that the next run requests it again.
+
+    Block or captcha pages are served with status 200 and get cached like the
+    real ones, so pages that can't be parsed must not be kept.
+    """
+    SESSION.cache.delete(urls=[url])
+
+
 def get_song_title_and_lyrics(lyrics_url: str) -> tuple:
     """
     Extract the song title and lyrics from a song page.
@@ -81,81 +106,59 @@ def get_song_title_and_lyrics(lyrics_url: str) -> tuple:
         lyrics_url: The URL of the lyrics page
 
     Returns:
-        Tuple of (song_title, lyrics_text) or (None, None) if not found
+        Tuple of (song_title, lyrics_text, from_cache), where song_title and
+        lyrics_text are None if not found, and from_cache tells if the page
+        was served from the cache instead of the server
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
-
     try:
-        response = requests.get(lyrics_url, headers=headers, timeout=10)
+        response = SESSION.get(lyrics_url, timeout=10)
         response.raise_for_status()
     except requests.RequestException as e:
         print(f"Error fetching {lyrics_url}: {e}")
-        return None, None
-
-    soup = BeautifulSoup(response.content, "html.parser")
-
-    # Find the main content div with class "col-xs-12 col-lg-8 text-center"
-    # Look for div with both col-xs-12 and col-lg-8 classes
-    main_content = None
-    for div in soup.find_all("div"):
-        classes = div.get("class")  # type: ignore
-        if (
-            isinstance(classes, list)
-            and "col-xs-12" in classes
-            and "col-lg-8" in classes
-        ):
-            main_content = div
-            break
+        return None, None, False
+
+    # Expired entries are still in the cache but are fetched again, so this
+    # must come from the response rather than from the cache contents
+    from_cache = getattr(response, "from_cache", False)
+
+    soup = BeautifulSoup(response.content, "lxml")
+
+    # Find the main content div with both col-xs-12 and col-lg-8 classes
+    main_content = soup.select_one("div.col-xs-12.col-lg-8")
 
     if not main_content:
         print(f"Could not find main content div in {lyrics_url}")
-        return "", None
-
-    # Find the ringtone div
-    ringtone_div = main_content.find("div", class_="ringtone")
+        _uncache(lyrics_url)
+        return "", None, from_cache
 
-    if not ringtone_div:
+    # The title and the lyrics are siblings that follow the ringtone div
+    if not main_content.select_one("div.ringtone"):
         print(f"Could not find ringtone div in {lyrics_url}")
-        return "", None
-
-    # Find the first <b> tag after ringtone_div for the song title
-    song_title = ""
-    current = ringtone_div.next_sibling
-
-    while current:
-        if hasattr(current, "name") and current.name == "b":  # type: ignore
-            song_title = current.get_text(strip=True)  # type: ignore
-            break
-        current = current.next_sibling if hasattr(current, "next_sibling") else None  # type: ignore
-
-    # Find the noprint div
-    noprint_div = main_content.find("div", class_="noprint")
-
-    lyrics_text = None
-
-    if ringtone_div and noprint_div:
-        # Find the lyrics div nested between ringtone and noprint
-        # Start searching from after ringtone_div
-        current = ringtone_div.next_sibling
-
-        while current and current != noprint_div:
-            # Look for a div element (the lyrics container)
-            if hasattr(current, "name") and current.name == "div":  # type: ignore
-                # Check if this div has no class (it's the lyrics div)
-                classes = current.get("class")  # type: ignore
-                if not classes or (isinstance(classes, list) and len(classes) == 0):
-                    # This is the lyrics div
-                    lyrics_text = current.get_text("\n", strip=True)  # type: ignore
-                    break
-            current = current.next_sibling if hasattr(current, "next_sibling") else None  # type: ignore
+        _uncache(lyrics_url)
+        return "", None, from_cache
+
+    # The song title is the first <b> tag after the ringtone div
+    title_tag = main_content.select_one("div.ringtone ~ b")
+    song_title = title_tag.get_text(strip=True) if title_tag else ""
+
+    # The lyrics are in the first div without a class after the ringtone div.
+    # An empty class attribute also counts, which :not([class]) would miss
+    lyrics_div = next(
+        (
+            div
+            for div in main_content.select("div.ringtone ~ div")
+            if not div.get("class")
+        ),
+        None,
+    )
+    lyrics_text = lyrics_div.get_text("\n", strip=True) if lyrics_div else None
 
     if not lyrics_text:
         print(f"Could not find lyrics in {lyrics_url}")
-        return song_title, None
+        _uncache(lyrics_url)
+        return song_title, None, from_cache
 
-    return song_title, lyrics_text
+    return song_title, lyrics_text, from_cache
 
 
 def scrape_and_save_all_lyrics(
@@ -187,39 +190,76 @@ def scrape_and_save_all_lyrics(
         print(f"Processing album: {album_name}")
         print(f"  Found {len(song_urls)} songs")
 
+        # Keep track of the songs that were already saved in previous runs, so
+        # they can be skipped without requesting the page again
+        manifest_path = os.path.join(album_folder, ".downloaded.tsv")
+        downloaded = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                for line in f:
+                    saved_url, _, saved_filename = line.rstrip("\n").partition("\t")
+                    downloaded[saved_url] = saved_filename
+        else:
+            # Folders from before the manifest existed can't be matched song by
+            # song, but an album with a non-empty file for every song is done
+            with os.scandir(album_folder) as entries:
+                saved_count = sum(
+                    1
+                    for entry in entries
+                    if entry.name.endswith(".txt")
+                    and entry.is_file()
+                    and entry.stat().st_size > 0
+                )
+            if song_urls and saved_count >= len(song_urls):
+                print(f"  Skipping album, all {saved_count} songs already saved\n")
+                continue
+
+        # Only wait between albums if something was actually downloaded
+        fetched_any = False
+
         # Scrape lyrics for each song
         for i, song_url in enumerate(song_urls, 1):
+            saved_filename = downloaded.get(song_url)
+            if saved_filename:
+                saved_path = os.path.join(album_folder, saved_filename)
+                if os.path.isfile(saved_path) and os.path.getsize(saved_path) > 0:
+                    print(f"  [{i}/{len(song_urls)}] Skipping {song_url}, already saved")
+                    continue
+
             try:
                 print(f"  [{i}/{len(song_urls)}] Scraping {song_url}...")
-                song_title, lyrics = get_song_title_and_lyrics(song_url)
+                song_title, lyrics, from_cache = get_song_title_and_lyrics(song_url)
 
                 if song_title and lyrics:
-                    # Create a filename from the song title
-                    filename = f"{song_title}.txt"
-                    # Replace invalid filename characters
-                    for char in ["/", "\\", ":", "*", "?", '"', "<", ">", "|"]:
-                        filename = filename.replace(char, "_")
+                    # Create a filename from the song title, replacing invalid
+                    # filename characters
+                    filename = f"{song_title}.txt".translate(_FNAME_TRANS)
 
                     filepath = os.path.join(album_folder, filename)
 
                     # Save lyrics to file
                     with open(filepath, "w", encoding="utf-8") as f:
                         f.write(lyrics)
+                    with open(manifest_path, "a", encoding="utf-8") as f:
+                        f.write(f"{song_url}\t{filename}\n")
 
                     print(f"      ✓ Saved: {filename}")
                 else:
                     print("      ✗ Could not extract lyrics")
 
                 # Be respectful to the server - add delay between requests
-                if i < len(song_urls):
-                    time.sleep(10)
+                if not from_cache:
+                    fetched_any = True
+                    if i < len(song_urls):
+                        time.sleep(10)
 
             except (requests.RequestException, OSError) as e:
                 print(f"      ✗ Error: {e}")
 
         print()
 
-        time.sleep(10)  # Add delay between albums
+        if fetched_any:
+            time.sleep(10)  # Add delay between albums
 
     print(f"Done! Lyrics saved to {output_dir}")
 
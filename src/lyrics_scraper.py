@@ -6,7 +6,9 @@ This script scrapes lyrics from webpages where lyrics are contained
 in <div> elements with the 'data-lyrics-container' attribute.
 """
 
+import asyncio
 import requests
+import httpx
 from bs4 import BeautifulSoup
 from typing import Optional, List
 import time
@@ -34,6 +36,10 @@ class LyricsScraper:
         if genius_key:
             self.headers['Authorization'] = f'Bearer {genius_key}'
             print("✓ Authorization header set with Genius API key")
+        
+        # Reuse connections across requests to the same host
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
     
     def scrape_lyrics(self, url: str, delay: float = 0) -> Optional[str]:
         """
@@ -56,11 +62,23 @@ class LyricsScraper:
         print(f"→ Scraping: {url}")
         
         # Fetch the webpage
-        response = requests.get(url, headers=self.headers, timeout=self.timeout)
+        response = self.session.get(url, timeout=self.timeout)
         response.raise_for_status()
         
+        return self._parse_lyrics(response.content)
+    
+    def _parse_lyrics(self, content: bytes) -> Optional[str]:
+        """
+        Extract the lyrics from the HTML content of a lyrics webpage.
+        
+        Args:
+            content: Raw HTML content of the page
+            
+        Returns:
+            Combined lyrics text or None if not found
+        """
         # Parse HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = BeautifulSoup(content, 'lxml')
         
         # Find all lyrics containers
         lyrics_divs = soup.find_all('div', {'data-lyrics-container': True})
@@ -117,6 +135,54 @@ class LyricsScraper:
         
         return results
     
+    async def scrape_many_async(
+        self,
+        urls: List[str],
+        concurrency: int = 10,
+        delay: float = 1.0
+    ) -> dict:
+        """
+        Scrape lyrics from multiple URLs concurrently.
+        
+        Args:
+            urls: List of URLs to scrape
+            concurrency: Maximum number of requests in flight at the same time
+            delay: Delay in seconds each worker waits after a request
+            
+        Returns:
+            Dictionary mapping URLs to their lyrics (None on failure)
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        loop = asyncio.get_running_loop()
+        
+        async def scrape_one(client: httpx.AsyncClient, url: str) -> Optional[str]:
+            async with semaphore:
+                print(f"→ Scraping: {url}")
+                try:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                finally:
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+            # Parse in the thread pool so the event loop is not blocked
+            return await loop.run_in_executor(None, self._parse_lyrics, response.content)
+        
+        async with httpx.AsyncClient(
+            headers=self.headers, http2=True, timeout=self.timeout
+        ) as client:
+            lyrics_list = await asyncio.gather(
+                *(scrape_one(client, url) for url in urls), return_exceptions=True
+            )
+        
+        results = {}
+        for url, lyrics in zip(urls, lyrics_list):
+            if isinstance(lyrics, Exception):
+                print(f"✗ Error scraping {url}: {lyrics}")
+                lyrics = None
+            results[url] = lyrics
+        
+        return results
+    
     def save_lyrics(self, lyrics: str, filename: str) -> None:
         """
         Save lyrics to a text file.
@@ -7,28 +7,134 @@ Supports multiple credential types and flexible API endpoints.
 """
 
 import os
-import sys
-import requests
+import httpx
+import orjson
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
 import json
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import base64
+import hashlib
+import random
+import socket
+import threading
 import time
 
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Genius API endpoints
+SEARCH_URL = 'https://api.genius.com/search'
+
+# Templates of the per-artist endpoints, filled in with str.format_map
+ARTIST_URL = 'https://api.genius.com/artists/{artist_id}'
+ARTIST_SONGS_URL = 'https://api.genius.com/artists/{artist_id}/songs'
+
+# Credentials sent as a Bearer token or as a client ID when they go in the
+# headers. Others are sent as-is in the Authorization header
+BEARER_CREDENTIALS = frozenset({'genius_key', 'api_key', 'token'})
+CLIENT_ID_CREDENTIALS = frozenset({'client', 'client_id'})
+
+# TCP keepalive probes stop NATs from dropping connections left idle between
+# pages. The receive buffer is left to the kernel's autotuning
+SOCKET_OPTIONS = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+if hasattr(socket, 'TCP_KEEPIDLE'):
+    SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60))
+elif hasattr(socket, 'TCP_KEEPALIVE'):
+    # macOS name of TCP_KEEPIDLE
+    SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, 60))
+if hasattr(socket, 'TCP_KEEPINTVL'):
+    SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 30))
+
+# Lowest request rate the limiter adapts to, in requests per second
+MIN_RATE = 0.1
+
+logger = logging.getLogger(__name__)
+
 
 class APIRequester:
     """Handle API requests with credential management."""
     
-    def __init__(self, workspace_dir: str = "."):
+    def __init__(
+        self,
+        workspace_dir: str = ".",
+        cache_dir: Optional[str] = ".genius_cache",
+        cache_ttl: timedelta = timedelta(weeks=1),
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        rate: float = 2.0,
+        burst: int = 4
+    ):
         """
         Initialize the API Requester.
         
         Args:
             workspace_dir: Directory containing .id credential files
+            cache_dir: Directory where JSON responses are cached, relative to
+                       workspace_dir. If None, responses are not cached
+            cache_ttl: How long a cached response stays valid
+            max_retries: Number of retries for timeouts, connection errors
+                         and retryable status codes (429 and 5xx)
+            base_delay: Base delay in seconds of the exponential backoff
+            max_delay: Maximum delay in seconds between two retries
+            rate: Requests per second allowed by the rate limiter. Updated
+                  from the X-RateLimit-* headers when the API sends them
+            burst: Number of requests that can be sent at once after
+                   an idle period
         """
         self.workspace_dir = Path(workspace_dir)
-        self.credentials = self._load_credentials()
+        # Credentials are read on first use
+        self._cred_cache: Dict[str, str] = {}
+        # credential_name -> (header name, header value)
+        self._header_spec: Dict[str, Tuple[str, str]] = {}
+        # (credential_name, use_query_param) -> (params, headers) to add
+        self._auth_cache: Dict[Tuple[str, bool], Tuple[Dict, Dict]] = {}
+        self.cache_dir = self.workspace_dir / cache_dir if cache_dir else None
+        self.cache_ttl = cache_ttl
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Parsed responses of this run, least recently used first. A fresh
+        # request replaces its entry, so later calls see the new response
+        self._json_memo: OrderedDict = OrderedDict()
+        self._json_memo_size = 1024
+        self._json_memo_lock = threading.Lock()
+        
+        # Token bucket: one token per request, refilled at `rate` per second
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._rate_lock = threading.Lock()
+        
+        # Keep connections alive between requests to the same host. With
+        # HTTP/2, concurrent requests share one connection as separate streams
+        self.client = httpx.Client(
+            transport=httpx.HTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=4, max_connections=8),
+                socket_options=SOCKET_OPTIONS
+            )
+        )
+    
+    def close(self) -> None:
+        """Close the underlying HTTP client."""
+        self.client.close()
+    
+    def __enter__(self) -> "APIRequester":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    @property
+    def credentials(self) -> Dict[str, str]:
+        """All credentials of the workspace, loading the ones not read yet."""
+        return self._load_credentials()
     
     def _load_credentials(self) -> Dict[str, str]:
         """
@@ -37,22 +143,51 @@ class APIRequester:
         Returns:
             Dictionary mapping credential names to their values
         """
-        credentials = {}
+        # scandir gets the file type from the directory listing, without
+        # an extra stat per file
+        with os.scandir(self.workspace_dir) as entries:
+            for entry in entries:
+                if not (entry.name.endswith('.id') and entry.is_file()):
+                    continue
+                credential_name = entry.name[:-3]  # Filename without extension
+                if credential_name not in self._cred_cache:
+                    self._read_credential(credential_name)
         
-        for id_file in self.workspace_dir.glob("*.id"):
-            credential_name = id_file.stem  # Filename without extension
-            try:
-                with open(id_file, 'r') as f:
-                    value = f.read().strip()
-                    credentials[credential_name] = value
-                    print(f"✓ Loaded credential: {credential_name}")
-            except Exception as e:
-                print(f"✗ Error loading {id_file.name}: {e}", file=sys.stderr)
+        if not self._cred_cache:
+            logger.warning("⚠ No credential files (.id) found in workspace")
         
-        if not credentials:
-            print("⚠ No credential files (.id) found in workspace", file=sys.stderr)
+        return dict(self._cred_cache)
+    
+    def _read_credential(self, name: str) -> Optional[str]:
+        """
+        Read a credential from its .id file and keep it in memory.
+        
+        Args:
+            name: Name of the credential (without .id extension)
+            
+        Returns:
+            Credential value or None if the file can't be read
+        """
+        id_file = self.workspace_dir / f"{name}.id"
+        try:
+            value = id_file.read_text().strip()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error("✗ Error loading %s: %s", id_file.name, e)
+            return None
+        self._cred_cache[name] = value
         
-        return credentials
+        # The header is classified here once, not on every request
+        if name.lower() in BEARER_CREDENTIALS:
+            self._header_spec[name] = ('Authorization', f'Bearer {value}')
+        elif name.lower() in CLIENT_ID_CREDENTIALS:
+            self._header_spec[name] = ('X-Client-ID', value)
+        else:
+            # Generic header as fallback
+            self._header_spec[name] = ('Authorization', value)
+        logger.info("✓ Loaded credential: %s", name)
+        return value
     
     def get_credential(self, name: str) -> Optional[str]:
         """
@@ -64,17 +199,61 @@ class APIRequester:
         Returns:
             Credential value or None if not found
         """
-        return self.credentials.get(name)
+        credential = self._cred_cache.get(name)
+        if credential is None:
+            credential = self._read_credential(name)
+        return credential
+    
+    def _auth(
+        self,
+        credential_name: str,
+        use_query_param: bool = True
+    ) -> Tuple[Dict, Dict]:
+        """
+        Build the query parameters and headers carrying a credential.
+        
+        The result is memoized, so the requests of a pagination loop reuse
+        the same dicts. Callers must not modify them.
+        
+        Args:
+            credential_name: Name of credential to use
+            use_query_param: If True, add credential as query parameter (access_token)
+                           If False, add credential to headers
+            
+        Returns:
+            Tuple of (params, headers) to add to the request
+            
+        Raises:
+            ValueError: If credential not found
+        """
+        key = (credential_name, use_query_param)
+        auth = self._auth_cache.get(key)
+        if auth is not None:
+            return auth
+        
+        credential = self.get_credential(credential_name)
+        if not credential:
+            raise ValueError(f"Credential '{credential_name}' not found")
+        
+        if use_query_param:
+            # Add credential as query parameter
+            auth = ({'access_token': credential}, {})
+        else:
+            header_name, header_value = self._header_spec[credential_name]
+            auth = ({}, {header_name: header_value})
+        
+        self._auth_cache[key] = auth
+        return auth
     
     def request(
         self,
-        url: str,
+        url: Union[str, httpx.URL],
         credential_name: Optional[str] = None,
         params: Optional[Dict] = None,
         headers: Optional[Dict] = None,
         timeout: int = 10,
         use_query_param: bool = True
-    ) -> requests.Response:
+    ) -> httpx.Response:
         """
         Send a GET request to the API.
         
@@ -88,77 +267,275 @@ class APIRequester:
                            If False, add credential to headers
             
         Returns:
-            Response object from requests library
+            Response object from httpx. Failed requests are retried
+            with exponential backoff, honoring Retry-After on 429 responses
             
         Raises:
             ValueError: If credential not found
-            requests.RequestException: If request fails
+            httpx.HTTPError: If request fails
         """
-        # Set up headers and params
-        request_headers = headers or {}
-        request_params = params or {}
+        # Set up headers and params, copying them so the caller's dicts
+        # are not modified
+        request_headers = dict(headers or {})
+        request_params = dict(params or {})
         
         # Add credential if specified
         if credential_name:
-            credential = self.get_credential(credential_name)
-            if not credential:
-                raise ValueError(f"Credential '{credential_name}' not found")
-            
-            if use_query_param:
-                # Add credential as query parameter
-                request_params['access_token'] = credential
-            else:
-                # Add credential to headers
-                if credential_name.lower() in ['genius_key', 'api_key', 'token']:
-                    request_headers['Authorization'] = f'Bearer {credential}'
-                elif credential_name.lower() in ['client', 'client_id']:
-                    request_headers['X-Client-ID'] = credential
-                else:
-                    # Generic header as fallback
-                    request_headers['Authorization'] = credential
+            auth_params, auth_headers = self._auth(credential_name, use_query_param)
+            request_params.update(auth_params)
+            request_headers.update(auth_headers)
         
         # Make request
-        print(f"→ GET {url}")
+        # %-style arguments are only formatted when the level is enabled
+        logger.debug("→ GET %s", url)
         if request_params:
-            print(f"  Parameters: {request_params}")
-        
-        response = requests.get(
-            url,
-            params=request_params,
-            headers=request_headers,
-            timeout=timeout
-        )
+            logger.debug("  Parameters: %s", request_params)
         
-        print(f"← Status: {response.status_code}")
+        for attempt in range(self.max_retries + 1):
+            self._acquire_token()
+            try:
+                response = self.client.get(
+                    url,
+                    params=request_params,
+                    headers=request_headers,
+                    timeout=timeout
+                )
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning("⚠ %s, retrying in %.1fs", e, delay)
+            else:
+                logger.debug("← Status: %s", response.status_code)
+                self._update_rate(response)
+                if (
+                    response.status_code not in RETRY_STATUS_CODES
+                    or attempt == self.max_retries
+                ):
+                    return response
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._backoff_delay(attempt)
+                logger.warning("⚠ Status %s, retrying in %.1fs", response.status_code, delay)
+            time.sleep(delay)
         
         return response
     
+    def _acquire_token(self) -> None:
+        """
+        Take a token from the rate limiter, waiting until one is available.
+        
+        The token is reserved before waiting, so concurrent callers queue up
+        instead of all waking at the same time.
+        """
+        with self._rate_lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._last_refill) * self.rate
+            )
+            self._last_refill = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+    
+    def _update_rate(self, response: httpx.Response) -> None:
+        """
+        Adapt the rate limiter to the quota reported by the API.
+        
+        The rate becomes the remaining number of requests divided by the time
+        until the quota resets. Responses without these headers are ignored.
+        
+        Args:
+            response: Response to an API request
+        """
+        try:
+            remaining = int(response.headers['X-RateLimit-Remaining'])
+            reset = float(response.headers['X-RateLimit-Reset'])
+        except (KeyError, ValueError):
+            return
+        # The reset can be given as a timestamp instead of a delay
+        if reset > time.time() / 2:
+            reset -= time.time()
+        if reset > 0:
+            with self._rate_lock:
+                self.rate = max(remaining / reset, MIN_RATE)
+    
+    def _backoff_delay(self, attempt: int, jitter: float = 0.5) -> float:
+        """
+        Compute the exponential backoff delay with random jitter.
+        
+        Args:
+            attempt: Number of the failed attempt, starting from 0
+            jitter: Maximum fraction of the delay added at random
+            
+        Returns:
+            Delay in seconds before the next attempt
+        """
+        delay = self.base_delay * 2 ** attempt * (1 + random.random() * jitter)
+        return min(delay, self.max_delay)
+    
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        """
+        Read the delay requested by the server in the Retry-After header.
+        
+        Args:
+            response: Response to a rate-limited request
+            
+        Returns:
+            Delay in seconds, or None if the header is missing or not a number
+        """
+        try:
+            return float(response.headers['Retry-After'])
+        except (KeyError, ValueError):
+            return None
+    
     def request_json(
         self,
-        url: str,
+        url: Union[str, httpx.URL],
         credential_name: Optional[str] = None,
         params: Optional[Dict] = None,
         headers: Optional[Dict] = None,
         timeout: int = 10,
-        use_query_param: bool = True
+        use_query_param: bool = True,
+        fresh: bool = False
     ) -> Dict:
         """
         Send a GET request and parse response as JSON.
         
+        Responses are cached on disk in cache_dir, and reused while they are
+        younger than cache_ttl. Within a run, parsed responses are also kept
+        in memory until clear_cache() is called: the same dict is returned
+        to every caller, so it must not be modified.
+        
         Args:
-            Same as request()
+            Same as request(), plus:
+            fresh: If True, ignore the cached responses and hit the API. The
+                   new response replaces them
             
         Returns:
             Parsed JSON response
             
         Raises:
             ValueError: If credential not found
-            requests.RequestException: If request fails
-            json.JSONDecodeError: If response is not valid JSON
+            httpx.HTTPError: If request fails
+            orjson.JSONDecodeError: If response is not valid JSON
+        """
+        # Dicts are not hashable, so they are frozen into sorted tuples to
+        # be used as part of the in-memory cache key
+        params_items = tuple(sorted(params.items())) if params else ()
+        headers_items = tuple(sorted(headers.items())) if headers else ()
+        key = (url, credential_name, params_items, headers_items, use_query_param)
+        if not self._is_hashable(key):
+            # Values such as lists for repeated params can't be part of the
+            # key, so those requests skip the in-memory cache
+            return self._fetch_json(
+                url, credential_name, params_items, headers_items,
+                timeout, use_query_param, fresh=fresh
+            )
+        
+        if not fresh:
+            with self._json_memo_lock:
+                if key in self._json_memo:
+                    self._json_memo.move_to_end(key)
+                    return self._json_memo[key]
+        
+        data = self._fetch_json(
+            url, credential_name, params_items, headers_items,
+            timeout, use_query_param, fresh=fresh
+        )
+        with self._json_memo_lock:
+            self._json_memo[key] = data
+            self._json_memo.move_to_end(key)
+            if len(self._json_memo) > self._json_memo_size:
+                self._json_memo.popitem(last=False)
+        return data
+    
+    @staticmethod
+    def _is_hashable(value) -> bool:
+        """Tell if a value can be used as an in-memory cache key."""
+        try:
+            hash(value)
+        except TypeError:
+            return False
+        return True
+    
+    def clear_cache(self) -> None:
+        """Forget the responses kept in memory. The disk cache is kept."""
+        with self._json_memo_lock:
+            self._json_memo.clear()
+    
+    def _fetch_json(
+        self,
+        url: Union[str, httpx.URL],
+        credential_name: Optional[str],
+        params_items: Tuple,
+        headers_items: Tuple,
+        timeout: int,
+        use_query_param: bool,
+        fresh: bool = False
+    ) -> Dict:
+        """
+        Get a JSON response from the disk cache or from the API.
+        
+        Args:
+            Same as request_json(), with params and headers given as
+            tuples of (key, value) pairs
+            
+        Returns:
+            Parsed JSON response
         """
+        params = dict(params_items)
+        headers = dict(headers_items)
+        cache_file = None
+        if self.cache_dir is not None:
+            cache_file = self.cache_dir / f"{self._cache_key(url, params, credential_name)}.json"
+            if not fresh and cache_file.exists():
+                age = time.time() - cache_file.stat().st_mtime
+                if age < self.cache_ttl.total_seconds():
+                    try:
+                        return orjson.loads(cache_file.read_bytes())
+                    except orjson.JSONDecodeError:
+                        # A corrupt entry is a miss, and is overwritten below
+                        logger.warning("⚠ Ignoring corrupt cache file %s", cache_file.name)
+        
         response = self.request(url, credential_name, params, headers, timeout, use_query_param)
         response.raise_for_status()
-        return response.json()
+        # Parse the raw bytes directly, without decoding them to str first
+        data = orjson.loads(response.content)
+        
+        if cache_file is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write to a file of this thread first, and move it in place in
+            # one step, so readers never see a partially written entry
+            tmp_file = cache_file.with_name(
+                f"{cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            tmp_file.write_bytes(orjson.dumps(data))
+            os.replace(tmp_file, cache_file)
+        
+        return data
+    
+    @staticmethod
+    def _cache_key(
+        url: Union[str, httpx.URL],
+        params: Optional[Dict] = None,
+        credential_name: Optional[str] = None
+    ) -> str:
+        """
+        Build the cache key of a GET request.
+        
+        Args:
+            url: API endpoint URL
+            params: Query parameters of the request
+            credential_name: Name of the credential used for the request
+            
+        Returns:
+            Hex digest identifying the request
+        """
+        key = f"GET|{url}|{json.dumps(params or {}, sort_keys=True)}|{credential_name}"
+        return hashlib.sha1(key.encode()).hexdigest()
   
     def request_search(
         self,
@@ -173,7 +550,7 @@ class APIRequester:
             Parsed JSON response from the search
         """
         return self.request_json(
-            'https://api.genius.com/search',
+            SEARCH_URL,
             credential_name=credential_name,
             params={'q': artist_name}
         )
@@ -190,7 +567,7 @@ class APIRequester:
         Returns:
             Parsed JSON response with artist details
         """
-        url = f'https://api.genius.com/artists/{artist_id}'
+        url = ARTIST_URL.format_map({'artist_id': artist_id})
         return self.request_json(
             url,
             credential_name=credential_name
@@ -212,7 +589,7 @@ class APIRequester:
         Returns:
             Parsed JSON response with songs by the artist
         """
-        url = f'https://api.genius.com/artists/{artist_id}/songs'
+        url = ARTIST_SONGS_URL.format_map({'artist_id': artist_id})
         params = {
             'per_page': per_page,
             'page': page
@@ -223,6 +600,52 @@ class APIRequester:
             params=params
         )
         
+    def iter_all_songs_by_artist(
+        self,
+        artist_id: str,
+        credential_name: str = 'genius_key',) -> Iterator[Dict]:
+        """
+        Iterate over all songs by an artist using the Genius API.
+        
+        Pages are requested as the songs are consumed, so the first songs
+        are available after a single request. The next page is fetched in a
+        background thread while the caller goes through the current one.
+        Args:
+            artist_id: ID of the artist
+            credential_name: Name of the credential to use
+        Yields:
+            Songs by the artist, in the order of the API pages
+        """
+        # Built once for all pages: request() copies params, so only the
+        # page number needs to change between iterations. Only the worker
+        # thread touches it, one page at a time. The URL is parsed once
+        # too, and httpx only merges the params into it for each page
+        url = httpx.URL(ARTIST_SONGS_URL.format_map({'artist_id': artist_id}))
+        params = {'per_page': 50, 'page': 1}
+        
+        def fetch_page(page: int) -> Optional[Dict]:
+            params['page'] = page
+            return self.request_json(
+                url,
+                credential_name=credential_name,
+                params=params
+            ).get('response')
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(fetch_page, 1)
+            while future is not None:
+                response = future.result()
+                if not (response and (songs := response.get('songs'))):
+                    return
+                # next_page is null on the last page, which saves requesting
+                # an empty page to find the end
+                next_page = response.get('next_page')
+                if next_page is not None:
+                    future = executor.submit(fetch_page, next_page)
+                else:
+                    future = None
+                yield from songs
+    
     def request_all_songs_by_artist(
         self,
         artist_id: str,
@@ -235,22 +658,32 @@ class APIRequester:
         Returns:
             List of all songs by the artist
         """
-        all_songs = []
-        page = 1
-        while True:
-            response = self.request_songs_by_artist(
-                artist_id,
-                per_page=50,
-                page=page,
-                credential_name=credential_name
-            )
-            songs = response.get('response', {}).get('songs', [])
-            if not songs:
-                break
-            all_songs.extend(songs)
-            page += 1
-            time.sleep(0.5)  # Rate limit protection
-        return all_songs
+        return list(self.iter_all_songs_by_artist(artist_id, credential_name))
     
-
-  
\ No newline at end of file
+    def request_all_songs_for_artists(
+        self,
+        artist_ids: Iterable[str],
+        credential_name: str = 'genius_key',
+        max_workers: int = 8,):
+        """
+        Get all songs by several artists, one artist per worker thread.
+        
+        The threads share the HTTP client and the rate limiter, so together
+        they stay within the same request quota.
+        Args:
+            artist_ids: IDs of the artists
+            credential_name: Name of the credential to use
+            max_workers: Maximum number of artists fetched at the same time
+        Returns:
+            Dictionary mapping each artist ID to the list of its songs
+        """
+        # map() consumes the IDs, so keep them to pair with the results
+        artist_ids = list(artist_ids)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            all_songs = executor.map(
+                lambda artist_id: self.request_all_songs_by_artist(
+                    artist_id, credential_name=credential_name
+                ),
+                artist_ids
+            )
+            return dict(zip(artist_ids, all_songs))